@@ -2,12 +2,32 @@ import frappe
 from frappe import _
 from frappe.utils import nowdate
 
+from healthcare_appointments.healthcare_appointments.dashboard import record_invoiced_revenue
 
 WALK_IN_CUSTOMER_NAME = "Walk-in Customer"
 
+EXISTS_CACHE_KEY = "healthcare_appointments:record_exists"
+EXISTS_CACHE_TTL = 6 * 60 * 60
+
+
+def record_exists(doctype, name):
+	"""
+	Cached frappe.db.exists for the master records every invoice needs.
+	Only hits are cached, so a record created later is still picked up.
+	"""
+	key = f"{EXISTS_CACHE_KEY}:{doctype}:{name}"
+	if frappe.cache.get_value(key):
+		return True
+
+	if frappe.db.exists(doctype, name):
+		frappe.cache.set_value(key, 1, expires_in_sec=EXISTS_CACHE_TTL)
+		return True
+
+	return False
+
 
 def get_or_create_walk_in_customer():
-	if frappe.db.exists("Customer", WALK_IN_CUSTOMER_NAME):
+	if record_exists("Customer", WALK_IN_CUSTOMER_NAME):
 		return WALK_IN_CUSTOMER_NAME
 
 	customer = frappe.new_doc("Customer")
@@ -26,7 +46,7 @@ def get_or_create_walk_in_customer():
 
 def ensure_service_item(service_name):
 	# Sales Invoices need an ERPNext Item — create one per service if missing
-	if frappe.db.exists("Item", service_name):
+	if record_exists("Item", service_name):
 		return service_name
 
 	item = frappe.new_doc("Item")
@@ -74,4 +94,6 @@ def create_sales_invoice_for_appointment(appointment_name):
 	si.submit()
 
 	frappe.db.set_value("Clinic Appointment", appointment_name, "sales_invoice", si.name)
+	# set_value skips doc events, so count the revenue here
+	record_invoiced_revenue(appointment.appointment_date, appointment.total_amount)
 	return si.name
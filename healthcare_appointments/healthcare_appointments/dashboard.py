@@ -0,0 +1,134 @@
+import frappe
+from frappe.utils import add_days, flt, getdate, nowdate
+
+# Per-date Redis hash of appointment counts by status plus invoiced revenue.
+# Kept current from Clinic Appointment events and overwritten from SQL by a periodic job,
+# so the desk never has to count rows on refresh.
+COUNTERS_KEY = "healthcare_appointments:appointment_counters"
+COUNTER_STATUSES = ("Scheduled", "Completed", "Cancelled")
+REVENUE_FIELD = "revenue"
+COUNTERS_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def get_counter_contribution(doc):
+	"""What a single appointment adds to its date's counters, as (date, status, revenue)."""
+	if not doc or not doc.appointment_date:
+		return None
+	revenue = flt(doc.total_amount) if doc.sales_invoice else 0
+	return str(getdate(doc.appointment_date)), doc.status, revenue
+
+
+def update_counters_for_change(before, after):
+	"""Queue counter deltas for an appointment moving from `before` to `after` (either may be None)."""
+	old, new = get_counter_contribution(before), get_counter_contribution(after)
+	if old == new:
+		return
+
+	deltas = []
+	if old:
+		deltas.append((old[0], old[1], -1, -old[2]))
+	if new:
+		deltas.append((new[0], new[1], 1, new[2]))
+
+	# applied only once the change is durable; the reconcile job covers anything missed
+	frappe.db.after_commit.add(lambda: apply_counter_deltas(deltas))
+
+
+def record_invoiced_revenue(appointment_date, amount):
+	deltas = [(str(getdate(appointment_date)), None, 0, flt(amount))]
+	frappe.db.after_commit.add(lambda: apply_counter_deltas(deltas))
+
+
+def apply_counter_deltas(deltas):
+	pipe = frappe.cache.pipeline()
+	for appointment_date, status, count, revenue in deltas:
+		key = _counters_key(appointment_date)
+		if not frappe.cache.hlen(key):
+			# not seeded yet — the first read reconciles it from SQL, don't start it from a partial count
+			continue
+		if status and count:
+			pipe.hincrby(key, status, count)
+		if revenue:
+			pipe.hincrbyfloat(key, REVENUE_FIELD, revenue)
+		pipe.expire(key, COUNTERS_TTL_SECONDS)
+	pipe.execute()
+
+
+def reconcile_counters(appointment_date=None):
+	"""Overwrite a date's counters with the truth from SQL."""
+	appointment_date = str(getdate(appointment_date or nowdate()))
+
+	counts = dict.fromkeys(COUNTER_STATUSES, 0)
+	revenue = 0.0
+	for row in frappe.db.sql(
+		"""
+		select status, count(*) as count,
+			sum(if(ifnull(sales_invoice, '') = '', 0, total_amount)) as revenue
+		from `tabClinic Appointment`
+		where appointment_date = %s
+		group by status
+		""",
+		appointment_date,
+		as_dict=True,
+	):
+		counts[row.status] = row.count
+		revenue += flt(row.revenue)
+
+	key = _counters_key(appointment_date)
+	pipe = frappe.cache.pipeline()
+	pipe.delete(key)
+	pipe.hset(key, mapping={**counts, REVENUE_FIELD: revenue})
+	pipe.expire(key, COUNTERS_TTL_SECONDS)
+	pipe.execute()
+
+	return {**counts, REVENUE_FIELD: revenue}
+
+
+def reconcile_recent_counters():
+	"""Scheduled: correct any drift for yesterday, today and tomorrow."""
+	today = nowdate()
+	for offset in (-1, 0, 1):
+		reconcile_counters(add_days(today, offset))
+
+
+@frappe.whitelist()
+def get_appointment_counters(date=None):
+	"""Counts by status and invoiced revenue for a date (default today), straight from Redis."""
+	frappe.has_permission("Clinic Appointment", "read", throw=True)
+
+	appointment_date = str(getdate(date or nowdate()))
+	fields = (*COUNTER_STATUSES, REVENUE_FIELD)
+	values = frappe.cache.hmget(_counters_key(appointment_date), fields)
+
+	if all(value is None for value in values):
+		# nothing tracked for this date yet, seed it once
+		return reconcile_counters(appointment_date)
+
+	counters = {status: int(value or 0) for status, value in zip(COUNTER_STATUSES, values[:-1], strict=True)}
+	counters[REVENUE_FIELD] = flt(values[-1])
+	return counters
+
+
+@frappe.whitelist()
+def get_scheduled_today(filters=None):
+	return {"value": get_appointment_counters()["Scheduled"], "fieldtype": "Int"}
+
+
+@frappe.whitelist()
+def get_completed_today(filters=None):
+	return {"value": get_appointment_counters()["Completed"], "fieldtype": "Int"}
+
+
+@frappe.whitelist()
+def get_cancelled_today(filters=None):
+	return {"value": get_appointment_counters()["Cancelled"], "fieldtype": "Int"}
+
+
+@frappe.whitelist()
+def get_revenue_today(filters=None):
+	return {"value": get_appointment_counters()[REVENUE_FIELD], "fieldtype": "Currency"}
+
+
+def _counters_key(appointment_date):
+	# raw hash commands, so build the site-scoped key ourselves
+	return frappe.cache.make_key(f"{COUNTERS_KEY}:{appointment_date}")
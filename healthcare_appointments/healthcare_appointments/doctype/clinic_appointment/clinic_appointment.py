@@ -3,7 +3,28 @@ import datetime
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import get_time
+from frappe.utils import cint, formatdate, get_time, getdate
+
+from healthcare_appointments.healthcare_appointments.dashboard import update_counters_for_change
+from healthcare_appointments.healthcare_appointments.doctype.clinic_calendar_settings.clinic_calendar_settings import (
+	get_open_intervals,
+	is_within_open_hours,
+	to_minutes,
+)
+from healthcare_appointments.healthcare_appointments.naming import (
+	enqueue_display_number_assignment,
+	get_naming_mode,
+	make_time_ordered_name,
+)
+from healthcare_appointments.healthcare_appointments.slot_holds import (
+	find_overlapping_hold,
+	hold_matches,
+	release_hold,
+)
+
+SCHEDULE_KEY = "healthcare_appointments:day_schedule"
+# one key per date, so dates nobody asks about again simply expire
+SCHEDULE_TTL_SECONDS = 60 * 60
 
 
 class ClinicAppointment(Document):
@@ -15,34 +36,92 @@ class ClinicAppointment(Document):
 
 		appointment_date: DF.Date
 		appointment_time: DF.Time
+		contact_key: DF.Data | None
+		display_number: DF.Data | None
 		estimated_end_time: DF.Time | None
 		patient_contact: DF.Data
 		patient_name: DF.Data
+		reminder_sent_on: DF.Datetime | None
+		reminder_status: DF.Literal["", "Sent", "Failed"]
 		sales_invoice: DF.Link | None
 		service: DF.Link
 		status: DF.Literal["Scheduled", "Completed", "Cancelled"]
 		total_amount: DF.Currency | None
 
+	def autoname(self):
+		# in "series" mode the doctype's APPT-.YYYY.-.##### autoname applies
+		if get_naming_mode() == "time_ordered":
+			self.name = make_time_ordered_name()
+
 	def before_save(self):
+		if self.is_new() and not self.display_number and get_naming_mode() == "series":
+			# the series name already is the human-friendly number
+			self.display_number = self.name
+		self.contact_key = normalize_contact(self.patient_contact)
+		if self.has_value_changed("appointment_date") or self.has_value_changed("appointment_time"):
+			# rescheduled, the old reminder no longer applies
+			self.reminder_status = None
+			self.reminder_sent_on = None
 		self.validate_working_hours()
 		self.validate_no_overlap()
 		self.calculate_end_time_and_amount()
 
+	def after_insert(self):
+		if not self.display_number:
+			enqueue_display_number_assignment()
+
 	def on_update(self):
+		self.clear_schedule_cache()
+		update_counters_for_change(self.get_doc_before_save(), self)
+
 		if self.status == "Completed":
 			frappe.logger().info(
 				f"[Healthcare Appointments] Appointment {self.name} for patient "
 				f"'{self.patient_name}' marked as Completed."
 			)
 
+	def on_trash(self):
+		self.clear_schedule_cache()
+		update_counters_for_change(self, None)
+
+	def clear_schedule_cache(self):
+		dates = {self.appointment_date}
+		before = self.get_doc_before_save()
+		if before:
+			dates.add(before.appointment_date)
+
+		for appointment_date in filter(None, dates):
+			clear_day_schedule_cache(appointment_date)
+			# again once committed, so a concurrent reader can't re-cache the pre-commit state
+			frappe.db.after_commit.add(lambda d=appointment_date: clear_day_schedule_cache(d))
+
 	def validate_working_hours(self):
-		if not self.appointment_time:
+		"""The whole appointment has to fit inside one of the day's open intervals from the clinic calendar."""
+		if not self.appointment_date or not self.appointment_time or not self.service:
+			return
+
+		# The calendar can change after booking; a status change or cancellation must still go through
+		if self.status == "Cancelled":
 			return
+		if not self.is_new() and not any(
+			self.has_value_changed(field) for field in ("appointment_date", "appointment_time", "service")
+		):
+			return
+
+		open_intervals = get_open_intervals(self.appointment_date)
+		if not open_intervals:
+			frappe.throw(
+				_("The clinic is closed on {0}.").format(frappe.bold(formatdate(self.appointment_date))),
+				title=_("Outside Working Hours"),
+			)
 
-		appt_time = get_time(self.appointment_time)
-		if appt_time < datetime.time(9, 0) or appt_time >= datetime.time(17, 0):
+		start, end = get_appointment_interval(self.service, self.appointment_time)
+		if not is_within_open_hours(self.appointment_date, start, end):
 			frappe.throw(
-				_("Appointments can only be scheduled between 9:00 AM and 5:00 PM."),
+				_("Appointments on {0} can only be scheduled within clinic hours: {1}.").format(
+					frappe.bold(formatdate(self.appointment_date)),
+					", ".join(f"{format_minutes(s)} - {format_minutes(e)}" for s, e in open_intervals),
+				),
 				title=_("Outside Working Hours"),
 			)
 
@@ -54,32 +133,33 @@ class ClinicAppointment(Document):
 		if not self.appointment_date or not self.appointment_time or not self.service:
 			return
 
-		service = frappe.get_cached_doc("Healthcare Service", self.service)
-		new_start = datetime.datetime.combine(datetime.date.today(), get_time(self.appointment_time))
-		new_end = new_start + datetime.timedelta(minutes=service.duration_minutes)
+		new_start, new_end = get_appointment_interval(self.service, self.appointment_time)
+		hold = self.flags.slot_hold
 
-		filters = {"appointment_date": self.appointment_date, "status": ["!=", "Cancelled"]}
-		if not self.is_new():
-			filters["name"] = ["!=", self.name]
+		appt = find_overlapping_appointment(
+			self.appointment_date, new_start, new_end, exclude=None if self.is_new() else self.name
+		)
+		if appt:
+			frappe.throw(
+				_("This time slot overlaps with {0}'s appointment ({1} – {2}).").format(
+					frappe.bold(appt.patient_name),
+					frappe.bold(format_minutes(appt.start)),
+					frappe.bold(format_minutes(appt.end)),
+				),
+				title=_("Appointment Overlap Detected"),
+			)
 
-		for appt in frappe.get_all(
-			"Clinic Appointment",
-			filters=filters,
-			fields=["name", "patient_name", "appointment_time", "service"],
-		):
-			duration = frappe.db.get_value("Healthcare Service", appt.service, "duration_minutes") or 0
-			existing_start = datetime.datetime.combine(datetime.date.today(), get_time(appt.appointment_time))
-			existing_end = existing_start + datetime.timedelta(minutes=int(duration))
-
-			if new_start < existing_end and new_end > existing_start:
-				frappe.throw(
-					_("This time slot overlaps with {0}'s appointment ({1} – {2}).").format(
-						frappe.bold(appt.patient_name),
-						frappe.bold(existing_start.strftime("%H:%M")),
-						frappe.bold(existing_end.strftime("%H:%M")),
-					),
-					title=_("Appointment Overlap Detected"),
-				)
+		# No other hold can overlap a live one, they are only granted under the date's hold lock
+		# after checking the existing holds, so a matching hold can skip the hold scan
+		if hold and hold_matches(hold, self.appointment_date, new_start, new_end, self.service):
+			frappe.db.after_commit.add(lambda: release_hold(hold))
+			return
+
+		if find_overlapping_hold(self.appointment_date, new_start, new_end, exclude=hold):
+			frappe.throw(
+				_("This time slot is being booked by someone else right now. Please pick another time."),
+				title=_("Appointment Overlap Detected"),
+			)
 
 	def calculate_end_time_and_amount(self):
 		if not self.service or not self.appointment_time:
@@ -91,6 +171,142 @@ class ClinicAppointment(Document):
 		self.total_amount = service.price
 
 
+def get_appointment_interval(service, appointment_time):
+	"""Start and end of an appointment as minutes since midnight."""
+	start = to_minutes(appointment_time)
+	duration = frappe.get_cached_value("Healthcare Service", service, "duration_minutes") or 0
+	return start, start + int(duration)
+
+
+def format_minutes(minutes):
+	return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def find_overlapping_appointment(appointment_date, start, end, exclude=None):
+	"""First non-cancelled appointment on the date whose interval overlaps `start`-`end`, if any."""
+	filters = {"appointment_date": appointment_date, "status": ["!=", "Cancelled"]}
+	if exclude:
+		filters["name"] = ["!=", exclude]
+
+	for appt in frappe.get_all(
+		"Clinic Appointment",
+		filters=filters,
+		fields=["name", "patient_name", "appointment_time", "service"],
+	):
+		existing_start, existing_end = get_appointment_interval(appt.service, appt.appointment_time)
+		if start < existing_end and end > existing_start:
+			return frappe._dict(appt, start=existing_start, end=existing_end)
+
+
+def get_day_schedule(appointment_date):
+	"""Non-cancelled appointments on a date as start/end HH:MM intervals, cached per date."""
+	appointment_date = str(getdate(appointment_date))
+	key = f"{SCHEDULE_KEY}:{appointment_date}"
+
+	schedule = frappe.cache.get_value(key)
+	if schedule is None:
+		schedule = _load_day_schedule(appointment_date)
+		frappe.cache.set_value(key, schedule, expires_in_sec=SCHEDULE_TTL_SECONDS)
+
+	return schedule
+
+
+def _load_day_schedule(appointment_date):
+	schedule = []
+	for appt in frappe.get_all(
+		"Clinic Appointment",
+		filters={"appointment_date": appointment_date, "status": ["!=", "Cancelled"]},
+		fields=["name", "appointment_time", "estimated_end_time", "service"],
+		order_by="appointment_time asc",
+	):
+		start = datetime.datetime.combine(datetime.date.today(), get_time(appt.appointment_time))
+		if appt.estimated_end_time:
+			end = datetime.datetime.combine(datetime.date.today(), get_time(appt.estimated_end_time))
+		else:
+			duration = frappe.get_cached_value("Healthcare Service", appt.service, "duration_minutes") or 0
+			end = start + datetime.timedelta(minutes=int(duration))
+
+		schedule.append({"name": appt.name, "start": start.strftime("%H:%M"), "end": end.strftime("%H:%M")})
+
+	return schedule
+
+
+def clear_day_schedule_cache(appointment_date=None):
+	if appointment_date:
+		frappe.cache.delete_value(f"{SCHEDULE_KEY}:{getdate(appointment_date)}")
+	else:
+		frappe.cache.delete_keys(f"{SCHEDULE_KEY}:")
+
+
+def normalize_contact(contact):
+	"""Lookup key for a patient contact: emails lower-cased, phone numbers reduced to their digits."""
+	contact = (contact or "").strip()
+	if "@" in contact:
+		return contact.lower()
+	return "".join(ch for ch in contact if ch.isdigit())
+
+
+@frappe.whitelist()
+def get_patient_history(contact, cursor=None, page_length=20):
+	"""
+	A returning patient's appointments, newest first, found by their normalized contact.
+	Paginated by keyset: pass back `next_cursor` to get the page after, so every page is
+	an index range read rather than an OFFSET scan over the patient's whole history.
+	"""
+	frappe.has_permission("Clinic Appointment", "read", throw=True)
+
+	contact_key = normalize_contact(contact)
+	if not contact_key:
+		return {"appointments": [], "next_cursor": None}
+
+	page_length = min(cint(page_length) or 20, 100)
+	values = {"contact_key": contact_key, "limit": page_length + 1}
+	cursor_condition = ""
+
+	if cursor:
+		try:
+			values["date"], values["time"], values["name"] = cursor.split("|", 2)
+		except ValueError:
+			frappe.throw(_("Invalid history cursor."))
+		cursor_condition = """
+			and (appointment_date < %(date)s
+				or (appointment_date = %(date)s and (appointment_time < %(time)s
+					or (appointment_time = %(time)s and name < %(name)s))))
+		"""
+
+	appointments = frappe.db.sql(
+		f"""
+		select name, patient_name, patient_contact, appointment_date, appointment_time,
+			estimated_end_time, service, status, total_amount, sales_invoice
+		from `tabClinic Appointment`
+		where contact_key = %(contact_key)s {cursor_condition}
+		order by appointment_date desc, appointment_time desc, name desc
+		limit %(limit)s
+		""",
+		values,
+		as_dict=True,
+	)
+
+	next_cursor = None
+	if len(appointments) > page_length:
+		appointments = appointments[:page_length]
+		last = appointments[-1]
+		next_cursor = f"{last.appointment_date}|{get_time(last.appointment_time).strftime('%H:%M:%S')}|{last.name}"
+
+	return {"appointments": appointments, "next_cursor": next_cursor}
+
+
+def on_doctype_update():
+	# invoice reconciliation looks up uninvoiced, non-cancelled appointments
+	frappe.db.add_index("Clinic Appointment", ["sales_invoice", "status"])
+	# patient history: equality on contact_key, then walked in date/time order
+	frappe.db.add_index("Clinic Appointment", ["contact_key", "appointment_date", "appointment_time"])
+	# reminder dispatch selects a day's Scheduled appointments
+	frappe.db.add_index("Clinic Appointment", ["appointment_date", "status"])
+	# display number assignment picks up appointments still waiting for one
+	frappe.db.add_index("Clinic Appointment", ["display_number"])
+
+
 @frappe.whitelist()
 def get_estimated_end_time(service, appointment_time):
 	if not service or not appointment_time:
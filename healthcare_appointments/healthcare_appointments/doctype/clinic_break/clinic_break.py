@@ -0,0 +1,23 @@
+# Copyright (c) 2026, Harpreet and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class ClinicBreak(Document):
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		description: DF.Data | None
+		end_time: DF.Time
+		parent: DF.Data
+		parentfield: DF.Data
+		parenttype: DF.Data
+		start_time: DF.Time
+		weekday: DF.Literal[
+			"Every Day", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"
+		]
+
+	pass
@@ -0,0 +1,150 @@
+# Copyright (c) 2026, Harpreet and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import get_time, getdate
+
+OPEN_INTERVALS_KEY = "healthcare_appointments:open_intervals"
+# one key per date, so dates nobody asks about again simply expire
+OPEN_INTERVALS_TTL_SECONDS = 6 * 60 * 60
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# Used while no working hours are configured, matching the clinic's original 9:00 AM - 5:00 PM
+DEFAULT_OPEN_INTERVALS = [(9 * 60, 17 * 60)]
+
+
+class ClinicCalendarSettings(Document):
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		from healthcare_appointments.healthcare_appointments.doctype.clinic_break.clinic_break import (
+			ClinicBreak,
+		)
+		from healthcare_appointments.healthcare_appointments.doctype.clinic_holiday.clinic_holiday import (
+			ClinicHoliday,
+		)
+		from healthcare_appointments.healthcare_appointments.doctype.clinic_working_hours.clinic_working_hours import (
+			ClinicWorkingHours,
+		)
+
+		breaks: DF.Table[ClinicBreak]
+		holidays: DF.Table[ClinicHoliday]
+		working_hours: DF.Table[ClinicWorkingHours]
+
+	def validate(self):
+		for row in self.working_hours:
+			if to_minutes(row.close_time) <= to_minutes(row.open_time):
+				frappe.throw(_("Row {0}: Closing time must be after opening time.").format(row.idx))
+
+		for row in self.breaks:
+			if to_minutes(row.end_time) <= to_minutes(row.start_time):
+				frappe.throw(_("Row {0}: Break must end after it starts.").format(row.idx))
+
+	def on_update(self):
+		clear_open_intervals_cache()
+		# again once committed, so a concurrent reader can't re-cache the old hours
+		frappe.db.after_commit.add(clear_open_intervals_cache)
+
+
+def to_minutes(value):
+	t = get_time(value)
+	return t.hour * 60 + t.minute
+
+
+def get_open_intervals(appointment_date):
+	"""
+	The clinic's open (start, end) intervals for a date, in minutes since midnight.
+	Compiled once per date from the weekday hours, breaks and holidays, then served from Redis
+	under a per-date key that expires.
+	"""
+	appointment_date = str(getdate(appointment_date))
+	key = f"{OPEN_INTERVALS_KEY}:{appointment_date}"
+
+	intervals = frappe.cache.get_value(key)
+	if intervals is None:
+		intervals = compile_open_intervals(appointment_date)
+		frappe.cache.set_value(key, intervals, expires_in_sec=OPEN_INTERVALS_TTL_SECONDS)
+
+	return intervals
+
+
+def compile_open_intervals(appointment_date, settings=None):
+	settings = settings or frappe.get_cached_doc("Clinic Calendar Settings")
+	appointment_date = getdate(appointment_date)
+
+	if any(getdate(holiday.holiday_date) == appointment_date for holiday in settings.holidays):
+		return []
+
+	weekday = WEEKDAYS[appointment_date.weekday()]
+	if settings.working_hours:
+		windows = [
+			(to_minutes(row.open_time), to_minutes(row.close_time))
+			for row in settings.working_hours
+			if row.weekday == weekday
+		]
+	else:
+		windows = list(DEFAULT_OPEN_INTERVALS)
+
+	breaks = [
+		(to_minutes(row.start_time), to_minutes(row.end_time))
+		for row in settings.breaks
+		if row.weekday in ("Every Day", weekday)
+	]
+
+	return subtract_intervals(merge_intervals(windows), breaks)
+
+
+def merge_intervals(intervals):
+	merged = []
+	for start, end in sorted(intervals):
+		if merged and start <= merged[-1][1]:
+			merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+		else:
+			merged.append((start, end))
+	return merged
+
+
+def subtract_intervals(intervals, cuts):
+	result = []
+	for interval in intervals:
+		pieces = [interval]
+		for cut_start, cut_end in cuts:
+			remaining = []
+			for start, end in pieces:
+				if cut_end <= start or cut_start >= end:
+					remaining.append((start, end))
+					continue
+				if start < cut_start:
+					remaining.append((start, cut_start))
+				if cut_end < end:
+					remaining.append((cut_end, end))
+			pieces = remaining
+		result.extend(pieces)
+	return sorted(result)
+
+
+def is_within_open_hours(appointment_date, start, end):
+	return any(
+		open_start <= start and end <= open_end
+		for open_start, open_end in get_open_intervals(appointment_date)
+	)
+
+
+def get_free_slots(appointment_date, duration, busy, step=15):
+	"""Start minutes, every `step` minutes, where `duration` fits inside open hours without touching `busy`."""
+	busy = merge_intervals(busy)
+	slots = []
+	for open_start, open_end in get_open_intervals(appointment_date):
+		for start in range(open_start, open_end - duration + 1, step):
+			end = start + duration
+			if not any(start < busy_end and end > busy_start for busy_start, busy_end in busy):
+				slots.append(start)
+	return slots
+
+
+def clear_open_intervals_cache():
+	frappe.cache.delete_keys(f"{OPEN_INTERVALS_KEY}:")
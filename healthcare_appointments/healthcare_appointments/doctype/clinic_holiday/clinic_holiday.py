@@ -0,0 +1,19 @@
+# Copyright (c) 2026, Harpreet and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class ClinicHoliday(Document):
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		description: DF.Data | None
+		holiday_date: DF.Date
+		parent: DF.Data
+		parentfield: DF.Data
+		parenttype: DF.Data
+
+	pass
@@ -0,0 +1,20 @@
+# Copyright (c) 2026, Harpreet and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class ClinicWorkingHours(Document):
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		close_time: DF.Time
+		open_time: DF.Time
+		parent: DF.Data
+		parentfield: DF.Data
+		parenttype: DF.Data
+		weekday: DF.Literal["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+	pass
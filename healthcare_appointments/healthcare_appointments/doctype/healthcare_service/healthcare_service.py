@@ -3,6 +3,16 @@
 
 import frappe
 from frappe.model.document import Document
+from frappe.utils import now_datetime, nowdate
+
+from healthcare_appointments.healthcare_appointments.doctype.clinic_appointment.clinic_appointment import (
+	clear_day_schedule_cache,
+)
+
+SERVICE_CATALOG_KEY = "healthcare_appointments:service_catalog"
+SERVICE_CATALOG_VERSION_KEY = "healthcare_appointments:service_catalog_version"
+# a bound on how long a catalog that slipped past an invalidation can be served
+SERVICE_CATALOG_TTL_SECONDS = 60 * 60
 
 
 class HealthcareService(Document):
@@ -18,5 +28,142 @@ class HealthcareService(Document):
 		price: DF.Currency
 		service_name: DF.Data
 
-	
-	pass
+	def on_update(self):
+		self.clear_catalog_cache()
+
+		before = self.get_doc_before_save()
+		if not before:
+			return
+
+		if self.has_value_changed("price") or self.has_value_changed("duration_minutes"):
+			frappe.enqueue(
+				reprice_future_appointments,
+				queue="short",
+				enqueue_after_commit=True,
+				service=self.name,
+				previous_duration=before.duration_minutes,
+			)
+
+	def on_trash(self):
+		self.clear_catalog_cache()
+
+	def clear_catalog_cache(self):
+		clear_service_catalog_cache()
+		# again once committed, so a concurrent reader can't re-cache the pre-commit catalog
+		frappe.db.after_commit.add(clear_service_catalog_cache)
+
+
+def get_service_catalog():
+	"""All services, ordered by name, served from Redis until the catalog changes."""
+	catalog = frappe.cache.get_value(SERVICE_CATALOG_KEY)
+	if catalog is None:
+		catalog = _load_service_catalog()
+		frappe.cache.set_value(SERVICE_CATALOG_KEY, catalog, expires_in_sec=SERVICE_CATALOG_TTL_SECONDS)
+
+	return catalog
+
+
+def _load_service_catalog():
+	return frappe.get_all(
+		"Healthcare Service",
+		fields=["name", "service_name", "price", "duration_minutes", "description"],
+		order_by="service_name asc",
+	)
+
+
+def get_service_catalog_version():
+	"""Opaque token that changes whenever the catalog does — use it to key anything derived from the catalog."""
+	version = frappe.cache.get_value(SERVICE_CATALOG_VERSION_KEY)
+	if version is None:
+		version = frappe.generate_hash(length=12)
+		frappe.cache.set_value(
+			SERVICE_CATALOG_VERSION_KEY, version, expires_in_sec=SERVICE_CATALOG_TTL_SECONDS
+		)
+
+	return version
+
+
+def clear_service_catalog_cache():
+	frappe.cache.delete_value([SERVICE_CATALOG_KEY, SERVICE_CATALOG_VERSION_KEY])
+
+
+def reprice_future_appointments(service, previous_duration=None):
+	"""
+	Push the service's current price and duration onto every future Scheduled appointment
+	with one set-based UPDATE, instead of waiting for each appointment to be re-saved.
+	Already-invoiced appointments keep the amount they were billed for.
+	"""
+	price, duration_minutes = frappe.db.get_value("Healthcare Service", service, ["price", "duration_minutes"])
+	duration_minutes = int(duration_minutes or 0)
+	today = nowdate()
+
+	frappe.db.sql(
+		"""
+		update `tabClinic Appointment`
+		set
+			estimated_end_time = addtime(appointment_time, sec_to_time(%(duration)s * 60)),
+			total_amount = if(ifnull(sales_invoice, '') = '', %(price)s, total_amount),
+			modified = %(modified)s
+		where service = %(service)s
+			and status = 'Scheduled'
+			and appointment_date >= %(today)s
+		""",
+		{
+			"service": service,
+			"price": price,
+			"duration": duration_minutes,
+			"today": today,
+			"modified": now_datetime(),
+		},
+	)
+
+	clear_day_schedule_cache()
+
+	overlaps = []
+	if previous_duration is not None and duration_minutes > int(previous_duration):
+		overlaps = get_new_overlaps_for_service(service, today, int(previous_duration))
+
+	if overlaps:
+		# this runs in a background job, so leave the clashes where staff will see them
+		frappe.log_error(
+			title=f"Longer duration for {service} created overlapping appointments",
+			message="\n".join(
+				f"{overlap.first} overlaps {overlap.second} on {overlap.appointment_date}"
+				for overlap in overlaps
+			),
+			reference_doctype="Healthcare Service",
+			reference_name=service,
+		)
+
+	return overlaps
+
+
+def get_new_overlaps_for_service(service, from_date, previous_duration):
+	"""
+	Pairs of non-cancelled appointments on or after `from_date` that overlap now but didn't
+	while `service` lasted `previous_duration` minutes, i.e. the ones its longer duration created.
+	"""
+	return frappe.db.sql(
+		"""
+		select a.name as first, b.name as second, a.appointment_date
+		from `tabClinic Appointment` a
+		join `tabClinic Appointment` b
+			on b.appointment_date = a.appointment_date
+			and b.name > a.name
+			and a.appointment_time < b.estimated_end_time
+			and b.appointment_time < a.estimated_end_time
+		where a.appointment_date >= %(from_date)s
+			and a.status != 'Cancelled'
+			and b.status != 'Cancelled'
+			and (a.service = %(service)s or b.service = %(service)s)
+			and not (
+				a.appointment_time < if(b.service = %(service)s,
+					addtime(b.appointment_time, sec_to_time(%(previous_duration)s * 60)), b.estimated_end_time)
+				and b.appointment_time < if(a.service = %(service)s,
+					addtime(a.appointment_time, sec_to_time(%(previous_duration)s * 60)), a.estimated_end_time)
+			)
+		order by a.appointment_date, a.appointment_time
+		""",
+		{"service": service, "from_date": from_date, "previous_duration": previous_duration},
+		as_dict=True,
+	)
@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+
+import frappe
+from frappe import _
+from frappe.utils import getdate
+from werkzeug.wrappers import Response
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_COLUMNS = [
+	"appointment",
+	"appointment_date",
+	"appointment_time",
+	"estimated_end_time",
+	"patient_name",
+	"patient_contact",
+	"status",
+	"service",
+	"duration_minutes",
+	"total_amount",
+	"sales_invoice",
+	"invoice_status",
+	"invoice_docstatus",
+	"invoice_grand_total",
+	"invoice_outstanding_amount",
+]
+
+# Joined in SQL so the export never loads whole documents, one row per appointment
+EXPORT_QUERY = """
+	select
+		ca.name as appointment,
+		ca.appointment_date,
+		ca.appointment_time,
+		ca.estimated_end_time,
+		ca.patient_name,
+		ca.patient_contact,
+		ca.status,
+		ca.service,
+		hs.duration_minutes,
+		ca.total_amount,
+		ca.sales_invoice,
+		si.status as invoice_status,
+		si.docstatus as invoice_docstatus,
+		si.grand_total as invoice_grand_total,
+		si.outstanding_amount as invoice_outstanding_amount
+	from `tabClinic Appointment` ca
+	left join `tabHealthcare Service` hs on hs.name = ca.service
+	left join `tabSales Invoice` si on si.name = ca.sales_invoice
+	where ca.appointment_date between %(from_date)s and %(to_date)s
+	order by ca.appointment_date, ca.appointment_time, ca.name
+"""
+
+
+@frappe.whitelist()
+def export_appointments(from_date, to_date, format="csv"):
+	"""Stream appointments joined with their service and invoice as CSV or NDJSON.
+
+	Rows are read through an unbuffered (server-side) cursor and written out in
+	chunks, so memory stays flat regardless of how wide the date range is.
+	"""
+	frappe.has_permission("Clinic Appointment", "export", throw=True)
+	frappe.has_permission("Sales Invoice", "read", throw=True)
+
+	if format not in EXPORT_FORMATS:
+		frappe.throw(_("Export format must be one of: {0}").format(", ".join(EXPORT_FORMATS)))
+
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	if from_date > to_date:
+		frappe.throw(_("From Date cannot be after To Date."))
+
+	filename = f"appointments_{from_date}_{to_date}.{'csv' if format == 'csv' else 'ndjson'}"
+	mimetype = "text/csv" if format == "csv" else "application/x-ndjson"
+
+	# No Content-Length is set, so werkzeug sends the body with chunked transfer encoding
+	response = Response(
+		_stream_export(frappe.local.site, frappe.session.user, from_date, to_date, format),
+		mimetype=mimetype,
+		direct_passthrough=True,
+	)
+	response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+	response.headers["Cache-Control"] = "no-store"
+	return response
+
+
+def _stream_export(site, user, from_date, to_date, format):
+	# The body is consumed after the request has been torn down, so the generator
+	# opens (and closes) its own site connection rather than borrowing the request's
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		frappe.set_user(user)
+		with frappe.db.unbuffered_cursor():
+			rows = frappe.db.sql(
+				EXPORT_QUERY,
+				{"from_date": from_date, "to_date": to_date},
+				as_dict=True,
+				as_iterator=True,
+			)
+			yield from iter_export_chunks(rows, format)
+	finally:
+		frappe.destroy()
+
+
+def iter_export_chunks(rows, format="csv", chunk_size=EXPORT_CHUNK_SIZE):
+	"""Serialise an iterable of row dicts into encoded chunks of `chunk_size` rows."""
+	buffer = io.StringIO()
+	writer = None
+
+	if format == "csv":
+		writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+		writer.writeheader()
+
+	pending = 0
+	for row in rows:
+		if writer:
+			writer.writerow(row)
+		else:
+			buffer.write(json.dumps({col: row.get(col) for col in EXPORT_COLUMNS}, default=str))
+			buffer.write("\n")
+
+		pending += 1
+		if pending >= chunk_size:
+			yield buffer.getvalue().encode()
+			buffer.seek(0)
+			buffer.truncate()
+			pending = 0
+
+	if buffer.tell():
+		yield buffer.getvalue().encode()
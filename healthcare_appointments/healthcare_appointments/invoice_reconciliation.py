@@ -0,0 +1,139 @@
+import time
+
+import frappe
+from frappe.utils import add_to_date, create_batch, now_datetime
+
+from healthcare_appointments.healthcare_appointments.accounting_utils import (
+	create_sales_invoice_for_appointment,
+	ensure_service_item,
+	get_or_create_walk_in_customer,
+)
+
+BATCH_SIZE = 25
+MAX_ATTEMPTS = 3
+BACKOFF_SECONDS = 2
+
+# Bookings younger than this may still be inside book_appointment's own transaction
+GRACE_MINUTES = 10
+
+PROGRESS_KEY = "healthcare_appointments:invoice_reconciliation"
+PROGRESS_FIELDS = ("total", "invoiced", "skipped", "failed")
+PROGRESS_TTL_SECONDS = 6 * 60 * 60
+# A run whose workers haven't reported anything for this long is treated as dead
+STALE_AFTER_SECONDS = 30 * 60
+
+
+def reconcile_missing_invoices():
+	"""Scheduled entry point — fans uninvoiced appointments out to background workers in batches."""
+	if _get_progress()["pending"]:
+		if _is_run_alive():
+			# previous run is still being worked through
+			return
+		# its workers died mid-batch; whatever they didn't invoice is picked up again below
+		frappe.logger().warning(
+			"[Healthcare Appointments] Invoice reconciliation run went stale, restarting."
+		)
+
+	names = get_uninvoiced_appointments()
+	_reset_progress(len(names))
+
+	for batch in create_batch(names, BATCH_SIZE):
+		frappe.enqueue(invoice_appointments, queue="long", names=list(batch), enqueue_after_commit=True)
+
+	return len(names)
+
+
+def get_uninvoiced_appointments(grace_minutes=GRACE_MINUTES):
+	# Spelled out in SQL (rather than an "is not set" filter, which becomes ifnull(...))
+	# so the sales_invoice/status index can be used
+	return frappe.db.sql(
+		"""
+		select name from `tabClinic Appointment`
+		where (sales_invoice is null or sales_invoice = '')
+			and status != 'Cancelled'
+			and total_amount > 0
+			and creation < %(cutoff)s
+		order by creation
+		""",
+		{"cutoff": add_to_date(now_datetime(), minutes=-grace_minutes)},
+		pluck=True,
+	)
+
+
+def invoice_appointments(names):
+	for name in names:
+		_record_progress(invoice_with_retry(name))
+
+
+def invoice_with_retry(name, max_attempts=MAX_ATTEMPTS, backoff_seconds=BACKOFF_SECONDS):
+	"""Invoice one appointment, retrying with exponential backoff. Returns the outcome field name."""
+	for attempt in range(1, max_attempts + 1):
+		try:
+			# These may insert and commit the master records, so settle them before
+			# taking the row lock below — a commit would release it
+			service = frappe.db.get_value("Clinic Appointment", name, "service")
+			if service:
+				get_or_create_walk_in_customer()
+				ensure_service_item(service)
+
+			# Lock the row and re-check, another worker or a manual fix may have got there first
+			appointment = frappe.db.get_value(
+				"Clinic Appointment",
+				name,
+				["sales_invoice", "status"],
+				as_dict=True,
+				for_update=True,
+			)
+			if not appointment or appointment.sales_invoice or appointment.status == "Cancelled":
+				frappe.db.rollback()
+				return "skipped"
+
+			create_sales_invoice_for_appointment(name)
+			frappe.db.commit()
+			return "invoiced"
+
+		except Exception:
+			frappe.db.rollback()
+			if attempt == max_attempts:
+				frappe.log_error(title=f"Invoice reconciliation failed for {name}")
+				return "failed"
+			time.sleep(backoff_seconds * 2 ** (attempt - 1))
+
+
+@frappe.whitelist()
+def get_reconciliation_progress():
+	frappe.only_for("System Manager")
+	return _get_progress()
+
+
+def _get_progress():
+	values = frappe.cache.mget([_progress_key(field) for field in PROGRESS_FIELDS])
+	progress = {field: int(value or 0) for field, value in zip(PROGRESS_FIELDS, values, strict=True)}
+	progress["pending"] = max(
+		progress["total"] - progress["invoiced"] - progress["skipped"] - progress["failed"], 0
+	)
+	return progress
+
+
+def _reset_progress(total):
+	pipe = frappe.cache.pipeline()
+	for field in PROGRESS_FIELDS:
+		pipe.set(_progress_key(field), total if field == "total" else 0, ex=PROGRESS_TTL_SECONDS)
+	pipe.set(_progress_key("heartbeat"), 1, ex=STALE_AFTER_SECONDS)
+	pipe.execute()
+
+
+def _record_progress(outcome):
+	pipe = frappe.cache.pipeline()
+	pipe.incr(_progress_key(outcome))
+	pipe.set(_progress_key("heartbeat"), 1, ex=STALE_AFTER_SECONDS)
+	pipe.execute()
+
+
+def _is_run_alive():
+	return bool(frappe.cache.get(_progress_key("heartbeat")))
+
+
+def _progress_key(field):
+	# raw redis counters, so build the site-scoped key ourselves
+	return frappe.cache.make_key(f"{PROGRESS_KEY}:{field}")
@@ -0,0 +1,104 @@
+import time
+from collections import defaultdict
+
+import frappe
+from frappe.utils import getdate
+
+# "series" (default) names appointments from the APPT-.YYYY.-.##### naming series, which
+# locks that year's tabSeries row until the booking commits. "time_ordered" names them
+# without any shared counter and hands out the human-friendly number afterwards in batches.
+NAMING_MODE_CONFIG_KEY = "healthcare_appointments_naming"
+NAMING_MODES = ("series", "time_ordered")
+DISPLAY_NUMBER_PREFIX = "APPT-{year}-"
+DISPLAY_NUMBER_DIGITS = 5
+DISPLAY_NUMBER_BATCH_SIZE = 500
+
+
+def get_naming_mode():
+	mode = frappe.conf.get(NAMING_MODE_CONFIG_KEY) or "series"
+	return mode if mode in NAMING_MODES else "series"
+
+
+def make_time_ordered_name():
+	# millisecond timestamp first so names sort by creation, random tail so they never collide
+	return f"APPT-{int(time.time() * 1000):012x}-{frappe.generate_hash(length=8)}"
+
+
+def enqueue_display_number_assignment():
+	# one queued job soaks up every booking that lands before a worker picks it up
+	frappe.enqueue(
+		assign_display_numbers,
+		queue="short",
+		job_id="assign_appointment_display_numbers",
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def assign_pending_display_numbers():
+	"""Scheduled sweep for anything the per-booking job missed; series mode has nothing to assign."""
+	if get_naming_mode() == "time_ordered":
+		assign_display_numbers()
+
+
+def assign_display_numbers(limit=DISPLAY_NUMBER_BATCH_SIZE):
+	"""Give appointments without a display number one from the naming series, a whole batch per series bump."""
+	# Plain read: a locking one would gap-lock the display_number index, and every concurrent
+	# time_ordered insert (all of which have it empty) would wait for this batch to commit
+	rows = frappe.db.sql(
+		"""
+		select name, creation from `tabClinic Appointment`
+		where display_number is null or display_number = ''
+		order by creation
+		limit %s
+		""",
+		limit,
+		as_dict=True,
+	)
+
+	by_prefix = defaultdict(list)
+	for row in rows:
+		by_prefix[DISPLAY_NUMBER_PREFIX.format(year=getdate(row.creation).year)].append(row.name)
+
+	assigned = 0
+	for prefix, names in by_prefix.items():
+		# The series row lock serialises concurrent sweeps. Once holding it, re-check by primary
+		# key, which locks just these rows, in case another sweep numbered some of them meanwhile
+		current = lock_series(prefix)
+		pending = frappe.db.sql(
+			"""
+			select name from `tabClinic Appointment`
+			where name in %(names)s and (display_number is null or display_number = '')
+			order by creation
+			for update
+			""",
+			{"names": names},
+			pluck=True,
+		)
+		if not pending:
+			continue
+
+		frappe.db.sql(
+			"update `tabSeries` set `current` = `current` + %s where `name` = %s", (len(pending), prefix)
+		)
+		frappe.db.bulk_update(
+			"Clinic Appointment",
+			{
+				name: {"display_number": f"{prefix}{number:0{DISPLAY_NUMBER_DIGITS}d}"}
+				for number, name in enumerate(pending, start=current + 1)
+			},
+			update_modified=False,
+		)
+		assigned += len(pending)
+
+	return assigned
+
+
+def lock_series(prefix):
+	"""Lock a tabSeries row until commit, creating it if needed, and return its current value."""
+	current = frappe.db.sql("select `current` from `tabSeries` where `name` = %s for update", prefix)
+	if current:
+		return current[0][0]
+
+	frappe.db.sql("insert into `tabSeries` (`name`, `current`) values (%s, 0)", prefix)
+	return 0
@@ -0,0 +1,115 @@
+"""
+Concurrency benchmark for Clinic Appointment naming modes.
+
+	bench --site clinic.localhost execute \
+		healthcare_appointments.healthcare_appointments.naming_benchmark.run \
+		--kwargs "{'threads': 16, 'per_thread': 50, 'hold_ms': 20}"
+
+Each thread opens its own connection and repeatedly names and inserts a bare appointment
+row inside a transaction that stays open for `hold_ms` (standing in for validation and
+invoicing in book_appointment), then rolls back. Only the benchmark's own series row is
+ever committed. In "series" mode every transaction holds the same tabSeries row lock, so
+throughput flattens at roughly 1000 / hold_ms inserts per second however many threads run.
+In "time_ordered" mode a display-number sweep runs alongside the inserts, the way the
+scheduler runs it in production, so any lock it takes on the insert path shows up here;
+with none, throughput scales with threads.
+
+Run it on a test site: the sweep numbers real appointments still waiting for a display
+number, and although it rolls back, it holds that year's series row while it does.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+from frappe.model.naming import make_autoname
+from frappe.utils import now_datetime
+
+from healthcare_appointments.healthcare_appointments.naming import (
+	NAMING_MODES,
+	assign_display_numbers,
+	make_time_ordered_name,
+)
+
+# separate from the real series so a benchmark can never disturb appointment numbers
+BENCHMARK_SERIES = "APPT-BENCH-.#####"
+
+
+def run(threads=8, per_thread=25, hold_ms=20):
+	site = frappe.local.site
+	sites_path = frappe.local.sites_path
+	threads, per_thread, hold_ms = int(threads), int(per_thread), float(hold_ms)
+
+	# create the series row up front, otherwise the first threads race to insert it
+	make_autoname(BENCHMARK_SERIES)
+	frappe.db.commit()
+
+	results = {}
+	for mode in NAMING_MODES:
+		done = threading.Event()
+		sweeps = []
+
+		started = time.perf_counter()
+		with ThreadPoolExecutor(max_workers=threads + 1) as pool:
+			sweeper = None
+			if mode == "time_ordered":
+				sweeper = pool.submit(_sweeper, site, sites_path, hold_ms, done, sweeps)
+			try:
+				for future in [
+					pool.submit(_worker, site, sites_path, mode, per_thread, hold_ms) for _ in range(threads)
+				]:
+					future.result()
+			finally:
+				done.set()
+			elapsed = time.perf_counter() - started
+			if sweeper:
+				sweeper.result()
+
+		total = threads * per_thread
+		results[mode] = {
+			"inserts": total,
+			"seconds": round(elapsed, 3),
+			"inserts_per_second": round(total / elapsed, 1),
+			"sweeps": len(sweeps),
+		}
+
+	results["speedup"] = round(
+		results["time_ordered"]["inserts_per_second"] / results["series"]["inserts_per_second"], 2
+	)
+	return results
+
+
+def _worker(site, sites_path, mode, per_thread, hold_ms):
+	frappe.init(site=site, sites_path=sites_path)
+	frappe.connect()
+	try:
+		for _ in range(per_thread):
+			name = make_autoname(BENCHMARK_SERIES) if mode == "series" else make_time_ordered_name()
+			now = now_datetime()
+			# a bare row with no display number, like every time_ordered booking has at first
+			frappe.db.sql(
+				"""
+				insert into `tabClinic Appointment` (name, creation, modified, owner, modified_by)
+				values (%s, %s, %s, 'Administrator', 'Administrator')
+				""",
+				(name, now, now),
+			)
+			time.sleep(hold_ms / 1000)
+			frappe.db.rollback()
+	finally:
+		frappe.destroy()
+
+
+def _sweeper(site, sites_path, hold_ms, done, sweeps):
+	frappe.init(site=site, sites_path=sites_path)
+	frappe.connect()
+	try:
+		while not done.is_set():
+			assign_display_numbers()
+			# keep the sweep's transaction open as long as an insert's, so its locks count
+			time.sleep(hold_ms / 1000)
+			frappe.db.rollback()
+			sweeps.append(1)
+	finally:
+		frappe.destroy()
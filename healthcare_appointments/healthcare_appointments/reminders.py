@@ -0,0 +1,195 @@
+import json
+import random
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, create_batch, format_date, format_time, now_datetime, nowdate
+
+BATCH_SIZE = 50
+RATE_LIMIT_PER_SECOND = 20
+
+# Dotted path to a ReminderTransport subclass in site_config, e.g. for a custom SMS gateway
+TRANSPORT_CONFIG_KEY = "healthcare_appointments_reminder_transport"
+
+
+class ReminderTransport:
+	"""
+	Delivers reminder messages; `send` raises on failure.
+
+	With `concurrency` above 1 the dispatcher calls `send` from a thread pool, where there
+	is no frappe context — so such transports must not touch the database or frappe.local.
+	"""
+
+	concurrency = 1
+
+	def send(self, message):
+		raise NotImplementedError
+
+
+class EmailSMSTransport(ReminderTransport):
+	"""Default transport: email for contacts that look like addresses, SMS Settings otherwise."""
+
+	def __init__(self):
+		self.sms_enabled = bool(frappe.db.get_single_value("SMS Settings", "sms_gateway_url"))
+
+	def send(self, message):
+		if "@" in message.recipient:
+			# only queues an Email Queue row, the mail itself goes out with the email worker
+			frappe.sendmail(
+				recipients=[message.recipient],
+				subject=message.subject,
+				message=message.body,
+				reference_doctype="Clinic Appointment",
+				reference_name=message.appointment,
+			)
+			return
+
+		if not self.sms_enabled:
+			raise frappe.ValidationError(_("SMS Settings are not configured."))
+
+		from frappe.core.doctype.sms_settings.sms_settings import send_sms
+
+		send_sms([message.recipient], message.body, success_msg=False)
+
+
+class FileTransport(ReminderTransport):
+	"""Appends each message as a JSON line to a file — for dry runs and offline load tests."""
+
+	def __init__(self, path=None, concurrency=8):
+		self.path = path or frappe.get_site_path("logs", "appointment_reminders.jsonl")
+		self.concurrency = concurrency
+		self._lock = threading.Lock()
+
+	def send(self, message):
+		line = json.dumps(message, default=str) + "\n"
+		with self._lock, open(self.path, "a") as f:
+			f.write(line)
+
+
+class FakeTransport(ReminderTransport):
+	"""In-memory stand-in with configurable latency and failure rate, for load tests and unit tests."""
+
+	def __init__(self, latency=0.0, failure_rate=0.0, concurrency=16):
+		self.latency = latency
+		self.failure_rate = failure_rate
+		self.concurrency = concurrency
+		self.sent = []
+		self._lock = threading.Lock()
+
+	def send(self, message):
+		if self.latency:
+			time.sleep(self.latency)
+		if self.failure_rate and random.random() < self.failure_rate:
+			raise ConnectionError(f"Simulated delivery failure for {message.appointment}")
+		with self._lock:
+			self.sent.append(message)
+
+
+def get_transport():
+	transport = frappe.conf.get(TRANSPORT_CONFIG_KEY)
+	return frappe.get_attr(transport)() if transport else EmailSMSTransport()
+
+
+def send_tomorrows_reminders():
+	"""Scheduled entry point."""
+	return dispatch_reminders(add_days(nowdate(), 1))
+
+
+def dispatch_reminders(
+	appointment_date, transport=None, batch_size=BATCH_SIZE, rate_limit=RATE_LIMIT_PER_SECOND
+):
+	"""
+	Send reminders for a date's Scheduled appointments that haven't had one yet.
+	Batches go out concurrently when the transport allows it, paced to `rate_limit`
+	messages per second, and each batch's delivery state is written in two bulk updates.
+	"""
+	transport = transport or get_transport()
+	messages = [_build_message(appt) for appt in get_due_reminders(appointment_date)]
+	totals = {"Sent": 0, "Failed": 0}
+
+	with ThreadPoolExecutor(max_workers=max(transport.concurrency, 1)) as pool:
+		for batch in create_batch(messages, batch_size):
+			started = time.monotonic()
+
+			if transport.concurrency > 1:
+				errors = list(pool.map(lambda m: _deliver(transport, m), batch))
+			else:
+				errors = [_deliver(transport, m) for m in batch]
+
+			sent = [m.appointment for m, error in zip(batch, errors, strict=True) if not error]
+			failed = {m.appointment: error for m, error in zip(batch, errors, strict=True) if error}
+			if failed:
+				# one log per batch rather than per message, a misconfigured gateway fails them all
+				frappe.log_error(
+					title=f"Appointment reminders failed for {appointment_date}",
+					message="\n\n".join(f"{name}:\n{error}" for name, error in failed.items()),
+				)
+			_record_delivery(sent, list(failed))
+			totals["Sent"] += len(sent)
+			totals["Failed"] += len(failed)
+
+			if rate_limit:
+				remaining = len(batch) / rate_limit - (time.monotonic() - started)
+				if remaining > 0:
+					time.sleep(remaining)
+
+	frappe.logger().info(
+		f"[Healthcare Appointments] Reminders for {appointment_date}: "
+		f"{totals['Sent']} sent, {totals['Failed']} failed."
+	)
+	return totals
+
+
+def get_due_reminders(appointment_date):
+	# served by the (appointment_date, status) index
+	return frappe.get_all(
+		"Clinic Appointment",
+		filters={
+			"appointment_date": appointment_date,
+			"status": "Scheduled",
+			"reminder_status": ["!=", "Sent"],
+		},
+		fields=["name", "patient_name", "patient_contact", "appointment_date", "appointment_time", "service"],
+		order_by="appointment_time asc",
+	)
+
+
+def _build_message(appt):
+	return frappe._dict(
+		appointment=appt.name,
+		recipient=appt.patient_contact,
+		subject=_("Appointment reminder"),
+		body=_("Hello {0}, this is a reminder of your {1} appointment on {2} at {3}.").format(
+			appt.patient_name,
+			appt.service,
+			format_date(appt.appointment_date),
+			format_time(appt.appointment_time, "HH:mm"),
+		),
+	)
+
+
+def _deliver(transport, message):
+	"""Send one message and return None, or the traceback if it failed."""
+	try:
+		transport.send(message)
+	except Exception:
+		# may be running in a pool thread without a frappe context, so leave logging to the caller
+		return traceback.format_exc()
+
+
+def _record_delivery(sent, failed):
+	now = now_datetime()
+	for names, status in ((sent, "Sent"), (failed, "Failed")):
+		if names:
+			frappe.db.set_value(
+				"Clinic Appointment",
+				{"name": ("in", names)},
+				{"reminder_status": status, "reminder_sent_on": now if status == "Sent" else None},
+				update_modified=False,
+			)
+	# keep finished batches even if a later one dies, so nobody gets the same reminder twice
+	frappe.db.commit()
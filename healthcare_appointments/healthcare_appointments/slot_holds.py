@@ -0,0 +1,148 @@
+import json
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe import _
+from frappe.utils import getdate
+from redis.exceptions import LockError
+
+# A hold reserves an interval on a date while a guest is filling in the booking form.
+# Each hold is its own key with a TTL, and a per-date sorted set (scored by expiry)
+# indexes them, so expired holds vanish from Redis without any database writes.
+HOLD_TTL_SECONDS = 5 * 60
+HOLD_KEY = "healthcare_appointments:slot_hold"
+HOLD_INDEX_KEY = "healthcare_appointments:slot_holds"
+HOLD_LOCK_KEY = "healthcare_appointments:slot_hold_lock"
+HOLD_OWNER_KEY = "healthcare_appointments:slot_hold_owner"
+# live holds one client (IP for guests) may keep at once, so nobody can hold the whole calendar
+MAX_HOLDS_PER_CLIENT = 3
+
+
+def create_hold(appointment_date, start, end, service, owner=None):
+	"""Store a hold for `start`-`end` (minutes since midnight) and return its token.
+
+	Callers must check for conflicts and call this inside `slot_lock` for the same date.
+	"""
+	appointment_date = str(getdate(appointment_date))
+	token = frappe.generate_hash(length=20)
+	expires_at = time.time() + HOLD_TTL_SECONDS
+	index = _index_key(appointment_date)
+
+	pipe = frappe.cache.pipeline()
+	pipe.set(
+		_hold_key(token),
+		json.dumps(
+			{"date": appointment_date, "start": start, "end": end, "service": service, "owner": owner}
+		),
+		ex=HOLD_TTL_SECONDS,
+	)
+	pipe.zadd(index, {token: expires_at})
+	pipe.expire(index, HOLD_TTL_SECONDS)
+	if owner:
+		pipe.zadd(_owner_key(owner), {token: expires_at})
+		pipe.expire(_owner_key(owner), HOLD_TTL_SECONDS)
+	pipe.execute()
+
+	return token
+
+
+def get_hold_owner():
+	return frappe.local.request_ip or frappe.session.user
+
+
+def count_owner_holds(owner):
+	pipe = frappe.cache.pipeline()
+	pipe.zremrangebyscore(_owner_key(owner), "-inf", time.time())
+	pipe.zcard(_owner_key(owner))
+	return pipe.execute()[1]
+
+
+def get_hold(token):
+	if not token:
+		return None
+
+	value = frappe.cache.get(_hold_key(token))
+	return frappe._dict(json.loads(value), token=token) if value else None
+
+
+def get_active_holds(appointment_date):
+	index = _index_key(str(getdate(appointment_date)))
+
+	pipe = frappe.cache.pipeline()
+	pipe.zremrangebyscore(index, "-inf", time.time())
+	pipe.zrange(index, 0, -1)
+	_, tokens = pipe.execute()
+	if not tokens:
+		return []
+
+	tokens = [frappe.safe_decode(token) for token in tokens]
+	values = frappe.cache.mget([_hold_key(token) for token in tokens])
+	return [
+		frappe._dict(json.loads(value), token=token)
+		for token, value in zip(tokens, values, strict=True)
+		if value
+	]
+
+
+def find_overlapping_hold(appointment_date, start, end, exclude=None):
+	for hold in get_active_holds(appointment_date):
+		if hold.token != exclude and start < hold.end and end > hold.start:
+			return hold
+
+
+def hold_matches(token, appointment_date, start, end, service):
+	hold = get_hold(token)
+	return bool(
+		hold
+		and hold.date == str(getdate(appointment_date))
+		and hold.service == service
+		and hold.start == start
+		and hold.end == end
+	)
+
+
+def release_hold(token):
+	hold = get_hold(token)
+	if not hold:
+		return
+
+	pipe = frappe.cache.pipeline()
+	pipe.delete(_hold_key(token))
+	pipe.zrem(_index_key(hold.date), token)
+	if hold.get("owner"):
+		pipe.zrem(_owner_key(hold.owner), token)
+	pipe.execute()
+
+
+@contextmanager
+def slot_lock(appointment_date):
+	"""Serialise hold creation per date so two guests can't hold the same interval."""
+	lock = frappe.cache.lock(
+		frappe.cache.make_key(f"{HOLD_LOCK_KEY}:{getdate(appointment_date)}"),
+		timeout=10,
+		blocking_timeout=5,
+	)
+	if not lock.acquire():
+		frappe.throw(_("The clinic is busy right now, please try again."), title=_("Slot Unavailable"))
+
+	try:
+		yield
+	finally:
+		try:
+			lock.release()
+		except LockError:
+			# lock already timed out, nothing left to release
+			pass
+
+
+def _hold_key(token):
+	return frappe.cache.make_key(f"{HOLD_KEY}:{token}")
+
+
+def _index_key(appointment_date):
+	return frappe.cache.make_key(f"{HOLD_INDEX_KEY}:{appointment_date}")
+
+
+def _owner_key(owner):
+	return frappe.cache.make_key(f"{HOLD_OWNER_KEY}:{owner}")
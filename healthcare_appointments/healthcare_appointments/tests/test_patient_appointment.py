@@ -58,9 +58,10 @@ def _cleanup_test_services():
 
 
 def _cleanup_test_appointments(contact_prefix):
+	# prefix match on the indexed contact_key is a range read, not a scan
 	for name in frappe.get_all(
 		"Clinic Appointment",
-		filters=[["patient_contact", "like", contact_prefix + "%"]],
+		filters=[["contact_key", "like", contact_prefix + "%"]],
 		pluck="name",
 	):
 		frappe.delete_doc("Clinic Appointment", name, ignore_permissions=True, force=True)
@@ -374,3 +375,579 @@ class TestPublicBooking(FrappeTestCase):
 		appt = frappe.get_doc("Clinic Appointment", result["appointment"])
 		t_str = str(appt.appointment_time).zfill(8)[:5]
 		self.assertEqual(t_str, "09:00")
+
+
+class TestAppointmentExport(FrappeTestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		_cleanup_test_appointments("9014")
+		frappe.db.commit()
+
+	def _rows(self, count):
+		return [
+			frappe._dict(
+				appointment=f"APPT-TEST-{i:05d}",
+				appointment_date=TEST_DATE,
+				patient_name="Export Patient",
+				status="Scheduled",
+				total_amount=500.0,
+			)
+			for i in range(count)
+		]
+
+	def test_csv_export_writes_header_once(self):
+		from healthcare_appointments.healthcare_appointments.exports import iter_export_chunks
+
+		chunks = list(iter_export_chunks(self._rows(5), "csv", chunk_size=2))
+		body = b"".join(chunks).decode()
+
+		self.assertEqual(len(chunks), 3)
+		self.assertEqual(body.count("appointment,appointment_date"), 1)
+		self.assertEqual(len(body.strip().splitlines()), 6)
+
+	def test_ndjson_export_one_object_per_line(self):
+		import json
+
+		from healthcare_appointments.healthcare_appointments.exports import iter_export_chunks
+
+		body = b"".join(iter_export_chunks(self._rows(3), "ndjson")).decode()
+		lines = body.strip().splitlines()
+
+		self.assertEqual(len(lines), 3)
+		self.assertEqual(json.loads(lines[0])["appointment"], "APPT-TEST-00000")
+		self.assertIsNone(json.loads(lines[0])["sales_invoice"])
+
+	def test_export_query_joins_service_and_invoice(self):
+		import csv
+
+		from healthcare_appointments.healthcare_appointments.exports import (
+			EXPORT_COLUMNS,
+			EXPORT_QUERY,
+			iter_export_chunks,
+		)
+
+		make_service()
+		appt = make_appointment(patient_contact="9014000001", appointment_time="14:00:00")
+
+		rows = frappe.db.sql(EXPORT_QUERY, {"from_date": TEST_DATE, "to_date": TEST_DATE}, as_dict=True)
+		body = b"".join(iter_export_chunks(rows, "csv")).decode()
+		exported = {row["appointment"]: row for row in csv.DictReader(body.splitlines())}
+
+		self.assertEqual(body.splitlines()[0], ",".join(EXPORT_COLUMNS))
+		self.assertEqual(exported[appt.name]["duration_minutes"], "30")
+		self.assertEqual(exported[appt.name]["service"], "_Test Service")
+		# left joined, so an appointment without an invoice is still exported with empty invoice columns
+		self.assertEqual(exported[appt.name]["invoice_status"], "")
+		self.assertEqual(exported[appt.name]["invoice_grand_total"], "")
+
+	def test_export_response_streams_attachment(self):
+		from healthcare_appointments.healthcare_appointments.exports import export_appointments
+
+		# the body generator only starts when the response is iterated, so this doesn't touch the DB
+		response = export_appointments(TEST_DATE, TEST_DATE, format="ndjson")
+
+		self.assertEqual(response.mimetype, "application/x-ndjson")
+		self.assertIn(f"appointments_{TEST_DATE}_{TEST_DATE}.ndjson", response.headers["Content-Disposition"])
+		self.assertNotIn("Content-Length", response.headers)
+
+	def test_export_requires_permission(self):
+		from healthcare_appointments.healthcare_appointments.exports import export_appointments
+
+		frappe.set_user("Guest")
+		self.addCleanup(frappe.set_user, "Administrator")
+		with self.assertRaises(frappe.PermissionError):
+			export_appointments(TEST_DATE, TEST_DATE)
+
+	def test_export_rejects_unknown_format(self):
+		from healthcare_appointments.healthcare_appointments.exports import export_appointments
+
+		with self.assertRaises(frappe.ValidationError):
+			export_appointments(TEST_DATE, TEST_DATE, format="xlsx")
+
+
+class TestServiceRepricing(FrappeTestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		_cleanup_test_appointments("9005")
+		_cleanup_test_services()
+		frappe.db.commit()
+
+	def test_future_appointments_pick_up_new_price_and_duration(self):
+		from healthcare_appointments.healthcare_appointments.doctype.healthcare_service.healthcare_service import (
+			reprice_future_appointments,
+		)
+
+		make_service("_Test Reprice Svc", price=400, duration_minutes=30)
+		appt = make_appointment(
+			patient_contact="9005000001",
+			appointment_time="10:00:00",
+			service="_Test Reprice Svc",
+		)
+
+		frappe.db.set_value("Healthcare Service", "_Test Reprice Svc", {"price": 650, "duration_minutes": 45})
+		reprice_future_appointments("_Test Reprice Svc")
+
+		appt.reload()
+		self.assertEqual(appt.total_amount, 650.0)
+		self.assertEqual(str(appt.estimated_end_time).zfill(8)[:5], "10:45")
+
+	def test_longer_duration_reports_new_overlaps(self):
+		from healthcare_appointments.healthcare_appointments.doctype.healthcare_service.healthcare_service import (
+			reprice_future_appointments,
+		)
+
+		make_service("_Test Stretch Svc", price=300, duration_minutes=30)
+		first = make_appointment(
+			patient_contact="9005000002",
+			appointment_time="15:00:00",
+			service="_Test Stretch Svc",
+		)
+		second = make_appointment(
+			patient_contact="9005000003",
+			appointment_time="15:30:00",
+			service="_Test Stretch Svc",
+		)
+
+		frappe.db.set_value("Healthcare Service", "_Test Stretch Svc", "duration_minutes", 60)
+		overlaps = reprice_future_appointments("_Test Stretch Svc", previous_duration=30)
+
+		self.assertIn((first.name, second.name), [(o.first, o.second) for o in overlaps])
+		self.assertTrue(
+			frappe.db.exists(
+				"Error Log", {"reference_doctype": "Healthcare Service", "reference_name": "_Test Stretch Svc"}
+			)
+		)
+
+		# the overlap exists already, so stretching it further doesn't report it again
+		frappe.db.set_value("Healthcare Service", "_Test Stretch Svc", "duration_minutes", 75)
+		self.assertEqual(reprice_future_appointments("_Test Stretch Svc", previous_duration=60), [])
+
+
+class TestInvoiceReconciliation(FrappeTestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		_cleanup_test_appointments("9006")
+		frappe.db.commit()
+
+	def test_uninvoiced_appointment_is_picked_up(self):
+		from healthcare_appointments.healthcare_appointments.invoice_reconciliation import (
+			get_uninvoiced_appointments,
+		)
+
+		appt = make_appointment(patient_contact="9006000001", appointment_time="16:00:00")
+		self.assertIn(appt.name, get_uninvoiced_appointments(grace_minutes=-1))
+
+	def test_cancelled_and_recent_appointments_are_ignored(self):
+		from healthcare_appointments.healthcare_appointments.invoice_reconciliation import (
+			get_uninvoiced_appointments,
+		)
+
+		appt = make_appointment(patient_contact="9006000002", appointment_time="16:30:00")
+		self.assertNotIn(appt.name, get_uninvoiced_appointments())
+
+		appt.status = "Cancelled"
+		appt.save()
+		self.assertNotIn(appt.name, get_uninvoiced_appointments(grace_minutes=-1))
+
+	def test_stale_run_is_restarted(self):
+		from healthcare_appointments.healthcare_appointments.invoice_reconciliation import (
+			_progress_key,
+			_reset_progress,
+			reconcile_missing_invoices,
+		)
+
+		self.addCleanup(_reset_progress, 0)
+
+		_reset_progress(5)
+		self.assertIsNone(reconcile_missing_invoices())
+
+		# workers died without reporting back
+		frappe.cache.delete(_progress_key("heartbeat"))
+		self.assertIsNotNone(reconcile_missing_invoices())
+
+
+class TestCachedLookups(FrappeTestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		_cleanup_test_appointments("9007")
+		frappe.db.commit()
+
+	@classmethod
+	def tearDownClass(cls):
+		from healthcare_appointments.healthcare_appointments.doctype.healthcare_service.healthcare_service import (
+			clear_service_catalog_cache,
+		)
+
+		super().tearDownClass()
+		# the services these tests create are rolled back, don't leave them in the cached catalog
+		clear_service_catalog_cache()
+
+	def test_service_catalog_refreshes_on_service_change(self):
+		from healthcare_appointments.healthcare_appointments.doctype.healthcare_service.healthcare_service import (
+			get_service_catalog,
+		)
+
+		get_service_catalog()
+		make_service("_Test Catalog Svc", price=100, duration_minutes=15)
+		self.assertIn("_Test Catalog Svc", [s.name for s in get_service_catalog()])
+
+	def test_day_schedule_tracks_bookings_and_cancellations(self):
+		from healthcare_appointments.healthcare_appointments.doctype.clinic_appointment.clinic_appointment import (
+			get_day_schedule,
+		)
+
+		get_day_schedule(TEST_DATE)
+		appt = make_appointment(patient_contact="9007000001", appointment_time="16:00:00")
+		self.assertIn(
+			{"name": appt.name, "start": "16:00", "end": "16:30"},
+			get_day_schedule(TEST_DATE),
+		)
+
+		appt.status = "Cancelled"
+		appt.save()
+		self.assertNotIn(appt.name, [slot["name"] for slot in get_day_schedule(TEST_DATE)])
+
+	def test_booking_form_fragment_follows_catalog_version(self):
+		from healthcare_appointments.www.book_appointment import get_booking_form_fragment
+
+		get_booking_form_fragment()
+		make_service("_Test Fragment Svc", price=150, duration_minutes=20)
+
+		fragment = get_booking_form_fragment()
+		self.assertIn('value="_Test Fragment Svc"', fragment)
+		self.assertNotIn("csrf", fragment)
+
+
+class TestSlotHolds(FrappeTestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		_cleanup_test_appointments("9008")
+		frappe.db.commit()
+
+	def test_held_slot_blocks_other_bookings(self):
+		from healthcare_appointments.healthcare_appointments.slot_holds import release_hold
+		from healthcare_appointments.healthcare_appointments.web_methods import hold_slot
+
+		make_service()
+		hold = hold_slot("_Test Service", TEST_DATE, "15:00")["hold"]
+		self.addCleanup(release_hold, hold)
+
+		with self.assertRaises(frappe.ValidationError):
+			hold_slot("_Test Service", TEST_DATE, "15:15")
+
+		with self.assertRaises(frappe.ValidationError):
+			make_appointment(patient_contact="9008000001", appointment_time="15:15:00")
+
+	def test_hold_converts_into_booking(self):
+		from healthcare_appointments.healthcare_appointments.slot_holds import release_hold
+		from healthcare_appointments.healthcare_appointments.web_methods import hold_slot
+
+		make_service()
+		hold = hold_slot("_Test Service", TEST_DATE, "16:00")["hold"]
+		self.addCleanup(release_hold, hold)
+
+		appt = make_appointment(patient_contact="9008000002", appointment_time="16:00:00", do_not_save=True)
+		appt.flags.slot_hold = hold
+		appt.insert(ignore_permissions=True)
+		self.assertIsNotNone(appt.name)
+
+		# the hold is still live until commit, but the booking it made must still block a second one
+		again = make_appointment(patient_contact="9008000004", appointment_time="16:00:00", do_not_save=True)
+		again.flags.slot_hold = hold
+		with self.assertRaises(frappe.ValidationError):
+			again.insert(ignore_permissions=True)
+
+	def test_released_hold_frees_the_slot(self):
+		from healthcare_appointments.healthcare_appointments.slot_holds import release_hold
+		from healthcare_appointments.healthcare_appointments.web_methods import hold_slot
+
+		make_service()
+		hold = hold_slot("_Test Service", TEST_DATE, "16:30")["hold"]
+		release_hold(hold)
+
+		appt = make_appointment(patient_contact="9008000003", appointment_time="16:30:00")
+		self.assertIsNotNone(appt.name)
+
+	def test_holds_are_capped_per_client_and_limited_to_open_hours(self):
+		from healthcare_appointments.healthcare_appointments.slot_holds import (
+			MAX_HOLDS_PER_CLIENT,
+			release_hold,
+		)
+		from healthcare_appointments.healthcare_appointments.web_methods import hold_slot
+
+		make_service()
+		with self.assertRaises(frappe.ValidationError):
+			hold_slot("_Test Service", TEST_DATE, "07:00")
+
+		for hour in range(9, 9 + MAX_HOLDS_PER_CLIENT):
+			self.addCleanup(release_hold, hold_slot("_Test Service", TEST_DATE, f"{hour:02d}:00")["hold"])
+
+		with self.assertRaises(frappe.ValidationError):
+			hold_slot("_Test Service", TEST_DATE, "13:00")
+
+
+class TestDashboardCounters(FrappeTestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		_cleanup_test_appointments("9009")
+		frappe.db.commit()
+
+	def test_reconcile_counts_by_status(self):
+		from healthcare_appointments.healthcare_appointments.dashboard import reconcile_counters
+
+		before = reconcile_counters(TEST_DATE)
+		appt = make_appointment(patient_contact="9009000001", appointment_time="16:00:00")
+		appt.status = "Completed"
+		appt.save()
+
+		after = reconcile_counters(TEST_DATE)
+		self.assertEqual(after["Completed"], before["Completed"] + 1)
+
+	def test_deltas_apply_to_seeded_counters(self):
+		from healthcare_appointments.healthcare_appointments.dashboard import (
+			apply_counter_deltas,
+			get_appointment_counters,
+			reconcile_counters,
+		)
+
+		seeded = reconcile_counters(TEST_DATE)
+		apply_counter_deltas([(TEST_DATE, "Scheduled", -1, 0), (TEST_DATE, "Cancelled", 1, 0)])
+
+		counters = get_appointment_counters(TEST_DATE)
+		self.assertEqual(counters["Scheduled"], seeded["Scheduled"] - 1)
+		self.assertEqual(counters["Cancelled"], seeded["Cancelled"] + 1)
+		reconcile_counters(TEST_DATE)
+
+
+class TestPatientHistory(FrappeTestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		_cleanup_test_appointments("9010")
+		frappe.db.commit()
+
+	def test_normalize_contact(self):
+		from healthcare_appointments.healthcare_appointments.doctype.clinic_appointment.clinic_appointment import (
+			normalize_contact,
+		)
+
+		self.assertEqual(normalize_contact(" 90100-00001 "), "9010000001")
+		self.assertEqual(normalize_contact("Patient@Example.COM"), "patient@example.com")
+		self.assertEqual(normalize_contact(None), "")
+
+	def test_history_pages_with_cursor(self):
+		from healthcare_appointments.healthcare_appointments.doctype.clinic_appointment.clinic_appointment import (
+			get_patient_history,
+		)
+
+		make_service()
+		booked = [
+			make_appointment(patient_contact="9010000001", appointment_time=t).name
+			for t in ("09:00:00", "10:00:00", "11:00:00")
+		]
+
+		first = get_patient_history("90100 00001", page_length=2)
+		self.assertEqual([a.name for a in first["appointments"]], booked[:0:-1])
+		self.assertTrue(first["next_cursor"])
+
+		second = get_patient_history("9010000001", cursor=first["next_cursor"], page_length=2)
+		self.assertEqual([a.name for a in second["appointments"]], [booked[0]])
+		self.assertIsNone(second["next_cursor"])
+
+
+class TestReminderDispatch(FrappeTestCase):
+	# dispatch_reminders commits after each batch, so tearDownClass cleans up persisted records
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		_cleanup_test_appointments("9011")
+		frappe.db.commit()
+
+	@classmethod
+	def tearDownClass(cls):
+		_cleanup_test_appointments("9011")
+		frappe.db.commit()
+		super().tearDownClass()
+
+	def test_reminders_sent_once_per_appointment(self):
+		from healthcare_appointments.healthcare_appointments.reminders import (
+			FakeTransport,
+			dispatch_reminders,
+		)
+
+		make_service()
+		appt = make_appointment(patient_contact="9011000001", appointment_time="16:00:00")
+
+		transport = FakeTransport()
+		dispatch_reminders(TEST_DATE, transport=transport, batch_size=2, rate_limit=0)
+
+		self.assertIn(appt.name, [m.appointment for m in transport.sent])
+		self.assertEqual(frappe.db.get_value("Clinic Appointment", appt.name, "reminder_status"), "Sent")
+
+		transport = FakeTransport()
+		dispatch_reminders(TEST_DATE, transport=transport, rate_limit=0)
+		self.assertNotIn(appt.name, [m.appointment for m in transport.sent])
+
+	def test_failed_delivery_is_recorded(self):
+		from healthcare_appointments.healthcare_appointments.reminders import (
+			FakeTransport,
+			dispatch_reminders,
+		)
+
+		make_service()
+		appt = make_appointment(patient_contact="9011000002", appointment_time="16:30:00")
+
+		dispatch_reminders(TEST_DATE, transport=FakeTransport(failure_rate=1.0), rate_limit=0)
+		self.assertEqual(frappe.db.get_value("Clinic Appointment", appt.name, "reminder_status"), "Failed")
+		self.assertTrue(
+			frappe.db.exists("Error Log", {"method": f"Appointment reminders failed for {TEST_DATE}"})
+		)
+
+
+class TestAppointmentNaming(FrappeTestCase):
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		_cleanup_test_appointments("9012")
+		frappe.db.commit()
+
+	def tearDown(self):
+		frappe.conf.pop("healthcare_appointments_naming", None)
+
+	def test_series_mode_uses_name_as_display_number(self):
+		make_service()
+		appt = make_appointment(patient_contact="9012000001", appointment_time="16:00:00")
+		self.assertTrue(appt.name.startswith("APPT-"))
+		self.assertEqual(appt.display_number, appt.name)
+
+	def test_time_ordered_names_sort_by_creation(self):
+		import time
+
+		from healthcare_appointments.healthcare_appointments.naming import make_time_ordered_name
+
+		names = [make_time_ordered_name() for _ in range(50)]
+		self.assertEqual(len(set(names)), 50)
+
+		earlier = make_time_ordered_name()
+		time.sleep(0.002)
+		self.assertLess(earlier, make_time_ordered_name())
+
+	def test_time_ordered_mode_assigns_display_number_in_batch(self):
+		from healthcare_appointments.healthcare_appointments.naming import assign_display_numbers
+
+		frappe.conf.healthcare_appointments_naming = "time_ordered"
+		make_service()
+		first = make_appointment(patient_contact="9012000002", appointment_time="10:00:00")
+		second = make_appointment(patient_contact="9012000003", appointment_time="10:30:00")
+		self.assertFalse(first.display_number)
+
+		assign_display_numbers()
+
+		numbers = [frappe.db.get_value("Clinic Appointment", a.name, "display_number") for a in (first, second)]
+		self.assertTrue(all(n and n.startswith("APPT-") for n in numbers))
+		self.assertEqual(int(numbers[1][-5:]), int(numbers[0][-5:]) + 1)
+
+
+class TestClinicCalendar(FrappeTestCase):
+
+	def _settings(self):
+		return frappe._dict(
+			working_hours=[
+				frappe._dict(weekday="Thursday", open_time="09:00:00", close_time="13:00:00"),
+				frappe._dict(weekday="Thursday", open_time="14:00:00", close_time="18:00:00"),
+				frappe._dict(weekday="Friday", open_time="10:00:00", close_time="12:00:00"),
+			],
+			breaks=[frappe._dict(weekday="Every Day", start_time="11:00:00", end_time="11:30:00")],
+			holidays=[frappe._dict(holiday_date="2099-01-22")],
+		)
+
+	def _remove_test_holiday(self):
+		from healthcare_appointments.healthcare_appointments.doctype.clinic_calendar_settings.clinic_calendar_settings import (
+			clear_open_intervals_cache,
+		)
+
+		settings = frappe.get_single("Clinic Calendar Settings")
+		settings.holidays = [h for h in settings.holidays if str(h.holiday_date) != TEST_DATE]
+		settings.save()
+		clear_open_intervals_cache()
+
+	def test_weekday_hours_minus_breaks(self):
+		from healthcare_appointments.healthcare_appointments.doctype.clinic_calendar_settings.clinic_calendar_settings import (
+			compile_open_intervals,
+		)
+
+		# TEST_DATE is a Thursday
+		self.assertEqual(
+			compile_open_intervals(TEST_DATE, self._settings()),
+			[(540, 660), (690, 780), (840, 1080)],
+		)
+		self.assertEqual(compile_open_intervals("2099-01-16", self._settings()), [(600, 660), (690, 720)])
+
+	def test_holidays_and_unlisted_weekdays_are_closed(self):
+		from healthcare_appointments.healthcare_appointments.doctype.clinic_calendar_settings.clinic_calendar_settings import (
+			compile_open_intervals,
+		)
+
+		self.assertEqual(compile_open_intervals("2099-01-22", self._settings()), [])
+		self.assertEqual(compile_open_intervals("2099-01-17", self._settings()), [])
+
+	def test_defaults_to_nine_to_five(self):
+		from healthcare_appointments.healthcare_appointments.doctype.clinic_calendar_settings.clinic_calendar_settings import (
+			compile_open_intervals,
+		)
+
+		settings = frappe._dict(working_hours=[], breaks=[], holidays=[])
+		self.assertEqual(compile_open_intervals(TEST_DATE, settings), [(540, 1020)])
+
+	def test_appointment_running_past_closing_raises(self):
+		make_service("_Test Long Svc", price=900, duration_minutes=60)
+		with self.assertRaises(frappe.ValidationError):
+			make_appointment(patient_contact="9013000001", appointment_time="16:30:00", service="_Test Long Svc")
+
+	def test_calendar_changes_do_not_block_status_updates(self):
+		make_service()
+		appt = make_appointment(patient_contact="9013000002", appointment_time="11:00:00")
+
+		settings = frappe.get_single("Clinic Calendar Settings")
+		settings.append("holidays", {"holiday_date": TEST_DATE})
+		settings.save()
+		# the class only rolls back at the end, so take the holiday out again before later tests
+		# book on TEST_DATE, and drop whatever was cached while it was in place
+		self.addCleanup(self._remove_test_holiday)
+
+		appt.status = "Completed"
+		appt.save()
+
+		appt.appointment_time = "11:30:00"
+		with self.assertRaises(frappe.ValidationError):
+			appt.save()
+
+		appt.reload()
+		appt.status = "Cancelled"
+		appt.save()
+
+	def test_free_slots_skip_busy_intervals(self):
+		from healthcare_appointments.healthcare_appointments.doctype.clinic_calendar_settings.clinic_calendar_settings import (
+			get_free_slots,
+		)
+
+		slots = get_free_slots(TEST_DATE, 30, busy=[(540, 600)], step=30)
+		self.assertNotIn(540, slots)
+		self.assertNotIn(570, slots)
+		self.assertIn(600, slots)
+		self.assertEqual(slots[-1], 990)
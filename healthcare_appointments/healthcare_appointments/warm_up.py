@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import frappe
+from frappe.utils import add_days, nowdate
+
+from healthcare_appointments.healthcare_appointments.accounting_utils import (
+	WALK_IN_CUSTOMER_NAME,
+	record_exists,
+)
+from healthcare_appointments.healthcare_appointments.doctype.clinic_appointment.clinic_appointment import (
+	get_day_schedule,
+)
+from healthcare_appointments.healthcare_appointments.doctype.clinic_calendar_settings.clinic_calendar_settings import (
+	get_open_intervals,
+)
+from healthcare_appointments.healthcare_appointments.doctype.healthcare_service.healthcare_service import (
+	clear_service_catalog_cache,
+	get_service_catalog,
+)
+from healthcare_appointments.www.book_appointment import get_booking_form_fragment
+
+# Claimed by whoever triggers a warm-up; it lives in the same Redis as the warmed
+# data, so a cache flush also clears it and the next job re-warms
+WARM_MARKER_KEY = "healthcare_appointments:caches_warm"
+WARM_MARKER_TTL = 60 * 60
+MAX_WORKERS = 4
+
+
+def after_migrate():
+	# templates may have changed with the deploy, so drop the catalog version the booking form is cached under
+	clear_service_catalog_cache()
+
+	# run from a worker so migrate isn't held up, and after it has finished clearing caches
+	_set_warm_marker()
+	frappe.enqueue(warm_up_caches, queue="short", enqueue_after_commit=True)
+
+
+def before_job():
+	"""First job a worker picks up after a deploy or cache flush triggers one warm-up."""
+	if _set_warm_marker(only_if_missing=True):
+		frappe.enqueue(warm_up_caches, queue="short")
+
+
+def _set_warm_marker(only_if_missing=False):
+	return frappe.cache.set(frappe.cache.make_key(WARM_MARKER_KEY), 1, nx=only_if_missing, ex=WARM_MARKER_TTL)
+
+
+def warm_up_caches():
+	"""Preload the caches guest booking hits first, in parallel, and return per-task timings in ms."""
+	site = frappe.local.site
+	sites_path = frappe.local.sites_path
+
+	tasks = {
+		"service_catalog": _warm_service_catalog,
+		"walk_in_customer": lambda: record_exists("Customer", WALK_IN_CUSTOMER_NAME),
+		"service_items": _warm_service_items,
+		"booking_form": get_booking_form_fragment,
+		"schedule_today": lambda: get_day_schedule(nowdate()),
+		"schedule_tomorrow": lambda: get_day_schedule(add_days(nowdate(), 1)),
+		"calendar_today": lambda: get_open_intervals(nowdate()),
+		"calendar_tomorrow": lambda: get_open_intervals(add_days(nowdate(), 1)),
+	}
+
+	started = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+		futures = {
+			label: executor.submit(_run_in_site, site, sites_path, task) for label, task in tasks.items()
+		}
+		timings = {label: future.result() for label, future in futures.items()}
+	timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+
+	frappe.logger().info(f"[Healthcare Appointments] Cache warm-up finished: {timings}")
+	return timings
+
+
+def _run_in_site(site, sites_path, task):
+	# each thread needs its own frappe context and DB connection
+	frappe.init(site=site, sites_path=sites_path)
+	frappe.connect()
+	try:
+		started = time.perf_counter()
+		task()
+		return round((time.perf_counter() - started) * 1000, 2)
+	except Exception:
+		frappe.log_error(title="Healthcare Appointments cache warm-up failed")
+		frappe.db.commit()
+		return None
+	finally:
+		frappe.destroy()
+
+
+def _warm_service_catalog():
+	for service in get_service_catalog():
+		frappe.get_cached_doc("Healthcare Service", service.name)
+
+
+def _warm_service_items():
+	for service in get_service_catalog():
+		record_exists("Item", service.name)
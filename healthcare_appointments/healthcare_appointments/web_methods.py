@@ -2,20 +2,139 @@ import datetime
 
 import frappe
 from frappe import _
-from frappe.utils import get_time
+from frappe.rate_limiter import rate_limit
+from frappe.utils import cint, get_time
 
 from healthcare_appointments.healthcare_appointments.accounting_utils import (
 	create_sales_invoice_for_appointment,
 )
+from healthcare_appointments.healthcare_appointments.doctype.clinic_appointment.clinic_appointment import (
+	find_overlapping_appointment,
+	format_minutes,
+	get_appointment_interval,
+	get_day_schedule,
+)
+from healthcare_appointments.healthcare_appointments.doctype.clinic_calendar_settings.clinic_calendar_settings import (
+	get_free_slots,
+	get_open_intervals,
+	is_within_open_hours,
+	to_minutes,
+)
+from healthcare_appointments.healthcare_appointments.doctype.healthcare_service.healthcare_service import (
+	get_service_catalog,
+)
+from healthcare_appointments.healthcare_appointments.slot_holds import (
+	HOLD_TTL_SECONDS,
+	MAX_HOLDS_PER_CLIENT,
+	count_owner_holds,
+	create_hold,
+	find_overlapping_hold,
+	get_active_holds,
+	get_hold_owner,
+	release_hold,
+	slot_lock,
+)
 
 
 @frappe.whitelist(allow_guest=True)
 def get_services():
-	return frappe.get_all(
-		"Healthcare Service",
-		fields=["name", "service_name", "price", "duration_minutes"],
-		order_by="service_name asc",
-	)
+	return [
+		{key: s[key] for key in ("name", "service_name", "price", "duration_minutes")}
+		for s in get_service_catalog()
+	]
+
+
+@frappe.whitelist(allow_guest=True)
+def get_booked_slots(appointment_date):
+	# intervals only — guests must not see who else is booked
+	if not appointment_date:
+		return []
+
+	slots = [{"start": slot["start"], "end": slot["end"]} for slot in get_day_schedule(appointment_date)]
+	slots += [
+		{"start": format_minutes(hold.start), "end": format_minutes(hold.end)}
+		for hold in get_active_holds(appointment_date)
+	]
+	return sorted(slots, key=lambda slot: slot["start"])
+
+
+@frappe.whitelist(allow_guest=True)
+def get_clinic_hours(appointment_date):
+	if not appointment_date:
+		return []
+	return [
+		{"start": format_minutes(start), "end": format_minutes(end)}
+		for start, end in get_open_intervals(appointment_date)
+	]
+
+
+@frappe.whitelist(allow_guest=True)
+def get_available_slots(service, appointment_date, step=15):
+	"""Start times (HH:MM) where the service fits in clinic hours without clashing with bookings or holds."""
+	if not service or not appointment_date:
+		return []
+
+	duration = frappe.get_cached_value("Healthcare Service", service, "duration_minutes")
+	if not duration:
+		return []
+
+	busy = [
+		(to_minutes(slot["start"]), to_minutes(slot["end"])) for slot in get_day_schedule(appointment_date)
+	]
+	busy += [(hold.start, hold.end) for hold in get_active_holds(appointment_date)]
+
+	return [
+		format_minutes(start)
+		for start in get_free_slots(appointment_date, int(duration), busy, step=max(cint(step), 5))
+	]
+
+
+@frappe.whitelist(allow_guest=True)
+@rate_limit(limit=30, seconds=60 * 60)
+def hold_slot(service, appointment_date, appointment_time, release=None):
+	"""Reserve an interval for a few minutes while the guest completes the booking form."""
+	if release:
+		release_hold(release)
+
+	if not all([service, appointment_date, appointment_time]):
+		frappe.throw(_("Service, date and time are required to hold a slot."))
+
+	if not frappe.db.exists("Healthcare Service", service):
+		frappe.throw(_("Selected service does not exist."))
+
+	start, end = get_appointment_interval(service, appointment_time)
+	if not is_within_open_hours(appointment_date, start, end):
+		frappe.throw(
+			_("This time is outside clinic hours. Please pick another time."),
+			title=_("Slot Unavailable"),
+		)
+
+	owner = get_hold_owner()
+	if count_owner_holds(owner) >= MAX_HOLDS_PER_CLIENT:
+		frappe.throw(
+			_("You are already holding {0} time slots. Please complete or release one first.").format(
+				MAX_HOLDS_PER_CLIENT
+			),
+			title=_("Slot Unavailable"),
+		)
+
+	with slot_lock(appointment_date):
+		if find_overlapping_appointment(appointment_date, start, end) or find_overlapping_hold(
+			appointment_date, start, end
+		):
+			frappe.throw(
+				_("This time slot is no longer available. Please pick another time."),
+				title=_("Slot Unavailable"),
+			)
+
+		hold = create_hold(appointment_date, start, end, service, owner=owner)
+
+	return {"hold": hold, "expires_in": HOLD_TTL_SECONDS}
+
+
+@frappe.whitelist(allow_guest=True)
+def release_slot_hold(hold):
+	release_hold(hold)
 
 
 @frappe.whitelist(allow_guest=True)
@@ -32,7 +151,7 @@ def get_end_time(service, appointment_time):
 
 
 @frappe.whitelist(allow_guest=True)
-def book_appointment(patient_name, patient_contact, appointment_date, appointment_time, service):
+def book_appointment(patient_name, patient_contact, appointment_date, appointment_time, service, hold=None):
 	if not all([patient_name, patient_contact, appointment_date, appointment_time, service]):
 		frappe.throw(_("All fields are required to book an appointment."))
 
@@ -50,6 +169,8 @@ def book_appointment(patient_name, patient_contact, appointment_date, appointmen
 	appointment.appointment_time = appointment_time
 	appointment.service = service
 	appointment.status = "Scheduled"
+	# a matching hold lets validate_no_overlap skip scanning the other holds
+	appointment.flags.slot_hold = hold
 	appointment.insert(ignore_permissions=True)
 
 	invoice_name = create_sales_invoice_for_appointment(appointment.name)
@@ -107,6 +107,11 @@ app_license = "mit"
 # before_app_uninstall = "healthcare_appointments.utils.before_app_uninstall"
 # after_app_uninstall = "healthcare_appointments.utils.after_app_uninstall"
 
+# Migration
+# ------------
+
+after_migrate = ["healthcare_appointments.healthcare_appointments.warm_up.after_migrate"]
+
 # Desk Notifications
 # ------------------
 # See frappe.core.notifications.get_notification_config
@@ -166,6 +171,24 @@ app_license = "mit"
 # 	],
 # }
 
+scheduler_events = {
+	"all": [
+		"healthcare_appointments.healthcare_appointments.naming.assign_pending_display_numbers",
+	],
+	"cron": {
+		"*/15 * * * *": [
+			"healthcare_appointments.healthcare_appointments.dashboard.reconcile_recent_counters",
+		],
+		# "daily" runs at midnight, too late at night for patients to get a reminder
+		"0 9 * * *": [
+			"healthcare_appointments.healthcare_appointments.reminders.send_tomorrows_reminders",
+		],
+	},
+	"hourly": [
+		"healthcare_appointments.healthcare_appointments.invoice_reconciliation.reconcile_missing_invoices",
+	],
+}
+
 # Testing
 # -------
 
@@ -204,6 +227,8 @@ app_license = "mit"
 # before_job = ["healthcare_appointments.utils.before_job"]
 # after_job = ["healthcare_appointments.utils.after_job"]
 
+before_job = ["healthcare_appointments.healthcare_appointments.warm_up.before_job"]
+
 # User Data Protection
 # --------------------
 
@@ -0,0 +1,26 @@
+import frappe
+from frappe.utils import create_batch
+
+from healthcare_appointments.healthcare_appointments.doctype.clinic_appointment.clinic_appointment import (
+	normalize_contact,
+)
+
+
+def execute():
+	names = frappe.get_all(
+		"Clinic Appointment",
+		filters={"contact_key": ("is", "not set")},
+		pluck="name",
+	)
+
+	for batch in create_batch(names, 500):
+		rows = frappe.get_all(
+			"Clinic Appointment",
+			filters={"name": ("in", batch)},
+			fields=["name", "patient_contact"],
+		)
+		frappe.db.bulk_update(
+			"Clinic Appointment",
+			{row.name: {"contact_key": normalize_contact(row.patient_contact)} for row in rows},
+			update_modified=False,
+		)
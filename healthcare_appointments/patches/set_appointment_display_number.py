@@ -0,0 +1,12 @@
+import frappe
+
+
+def execute():
+	# every appointment so far was named from the series, so its name is its display number
+	frappe.db.sql(
+		"""
+		update `tabClinic Appointment`
+		set display_number = name
+		where display_number is null or display_number = ''
+		"""
+	)
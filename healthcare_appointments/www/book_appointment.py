@@ -3,14 +3,33 @@
 
 import frappe
 
+from healthcare_appointments.healthcare_appointments.doctype.healthcare_service.healthcare_service import (
+	get_service_catalog,
+	get_service_catalog_version,
+)
+
+# Whole-page caching would freeze the session's CSRF token into the HTML, so only
+# the booking form fragment is cached (per catalog version) and the shell is rendered per request
 no_cache = 1
 
+FORM_TEMPLATE = "healthcare_appointments/templates/includes/book_appointment_form.html"
+FORM_FRAGMENT_KEY = "healthcare_appointments:book_appointment_form"
+FORM_FRAGMENT_TTL = 24 * 60 * 60
+
 
 def get_context(context):
 	context.title = "Book an Appointment"
-	context.services = frappe.get_all(
-		"Healthcare Service",
-		fields=["name", "service_name", "price", "duration_minutes", "description"],
-		order_by="service_name asc",
-	)
+	context.booking_form = get_booking_form_fragment()
 	return context
+
+
+def get_booking_form_fragment():
+	# old versions are never read again once the catalog changes and simply expire
+	key = f"{FORM_FRAGMENT_KEY}:{get_service_catalog_version()}"
+
+	fragment = frappe.cache.get_value(key)
+	if fragment is None:
+		fragment = frappe.render_template(FORM_TEMPLATE, {"services": get_service_catalog()})
+		frappe.cache.set_value(key, fragment, expires_in_sec=FORM_FRAGMENT_TTL)
+
+	return fragment